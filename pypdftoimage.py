@@ -43,34 +43,51 @@ For more information, please refer to <http://unlicense.org/>
 """
 
 
-import os, platform, subprocess
+from __future__ import annotations
 
+import asyncio, concurrent.futures, functools, os, platform, subprocess, \
+       threading
 
-__all__ = 'convert', 'pdfinfo'
+
+__all__ = 'convert', 'convert_async', 'pdfinfo'
 
 PAGEKEY = 'Pages'
 EXT = dict(tiff='tif', png='png', jpeg='jpg', jpegcmyk='jpg')
-TIFFCOMPRESSION = 'packbits', 'jpeg', 'lzw', 'deflate'
+TOOL = dict(tiff='pdftoppm', png='pdftocairo', jpeg='pdftocairo',
+            jpegcmyk='pdftoppm')
+TIFFCOMPRESSION = frozenset({'packbits', 'jpeg', 'lzw', 'deflate'})
 COMPSWITCH = '-tiffcompression'
-ADDLSWITCHES = ['-aa', 'yes', '-aaVector', 'yes', '-singlefile', '-f',
-                '{filepage}', '-l', '{filepage}']
+AASWITCHES = dict(pdftoppm=['-aa', 'yes', '-aaVector', 'yes'],
+                  pdftocairo=['-antialias', 'best'])
+MAXPROCESSES = 8
+
+_ENVIRONS = dict()
 
+if platform.system() == 'Windows':
+    _STARTUPINFO = subprocess.STARTUPINFO()
+    _STARTUPINFO.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    _STARTUPINFO.wShowWindow = subprocess.SW_HIDE
+else: _STARTUPINFO = None
 
-def convert(source_path: str, output_path_prefix: str,
+
+def convert(source_path: str | os.PathLike,
+            output_path_prefix: str | os.PathLike,
             img_format: str = 'tiff', dpi: int = 300,
             user_password: str = None, owner_password: str = None,
             grayscale: bool = False, tiff_compression: str = None,
             page_num: int = False, page_num_offset: int = None,
-            page_num_zfill: int = None, poppler_bin_path: str = None) -> list:
+            page_num_zfill: int = None, poppler_bin_path: str = None,
+            thread_count: int = None, pages: int = None,
+            to_bytes: bool = False, auto_bitdepth: bool = False) -> list:
     """Converts a PDF file to an image or series of images and returns the
     paths to converted files as a list object
 
     Parameters:
     
-        source_path: str
+        source_path: str or os.PathLike
             The full path to the source PDF file.
 
-        output_path_prefix: str
+        output_path_prefix: str or os.PathLike
             The prefix for output files, including the output directory and
             the first part of the desired filename. Adding a '{page}' string
             anywhere in the filename will set where the number will appear for
@@ -128,49 +145,136 @@ def convert(source_path: str, output_path_prefix: str,
             The full path to the Poppler binary folder (for use if the path to
             Poppler binaries is not in the PATH environmental variable).
             DEFAULT: None
+
+        thread_count (optional): int
+            The number of pages to render concurrently. An explicit value is
+            honored as given; if not specified, one less than the number of
+            available processors is used, with a minimum of one and a maximum
+            of MAXPROCESSES (beyond which contention and handle exhaustion
+            outweigh any gain). DEFAULT: None
+
+        pages (optional): int
+            The number of pages in the source PDF file, if already known by
+            the caller. Specifying this skips the pdfinfo call otherwise used
+            to determine the page count. DEFAULT: None
+
+        to_bytes (optional): bool
+            Specifies if rendered pages are returned as a list of bytes
+            objects (one per page, in page order) instead of being written to
+            disk, for pipelines that consume the images directly. When set,
+            output_path_prefix and the page numbering options are ignored.
+            Supported for the 'png', 'jpeg', and 'jpegcmyk' formats; 'tiff'
+            is rejected because TIFF files cannot be written to a
+            non-seekable stream. DEFAULT: False
+
+        auto_bitdepth (optional): bool
+            Specifies if the images embedded in the source PDF should be
+            inspected (via pdfimages) to select a reduced output bit depth
+            automatically: sources carrying only monochrome images render
+            1-bit (TIFF output only) and grayscale-only sources render
+            8-bit grayscale, drastically reducing output size for scanned
+            documents. Applies to the 'tiff', 'png', and 'jpeg' formats;
+            color sources, 'jpegcmyk', and unrecognized formats are
+            unaffected. DEFAULT: False
     """
+    source_path = os.fspath(source_path)
+    pages = pages or _pagecount(source_path, user_password, owner_password,
+                                poppler_bin_path)
+    output_path = _stripextension(os.fspath(output_path_prefix))
+    params, ext, tool = _getrenderparams(
+        img_format, dpi, user_password, owner_password, grayscale,
+        tiff_compression, poppler_bin_path)
+    if (auto_bitdepth and not grayscale and img_format in EXT
+        and img_format != 'jpegcmyk'):
+        mode = _getcolormode(source_path, user_password, owner_password,
+                             poppler_bin_path)
+        if mode == 'mono' and img_format == 'tiff': params += ('-mono',)
+        elif mode: params += ('-gray',)
+    workers = _getworkers(thread_count)
+    if to_bytes:
+        if img_format == 'tiff':
+            raise Exception('Unable to render TIFF output to memory (TIFF '
+                            'writing requires a seekable file); use png, '
+                            'jpeg, or jpegcmyk with to_bytes, or convert '
+                            'to files instead')
+        files = (source_path, '-') if tool == 'pdftocairo' else (source_path,)
+        render = functools.partial(
+            _render_page_bytes, params=params, files=files,
+            poppler_bin_path=poppler_bin_path,
+            semaphore=threading.BoundedSemaphore(workers))
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers) as executor:
+            return list(executor.map(render, range(1, pages + 1)))
+    files = source_path, output_path.replace('{page}', '')
+    render = functools.partial(
+        _render_block, params=params, files=files, output_path=output_path,
+        ext=ext, pages=pages, page_num=page_num,
+        page_num_offset=page_num_offset, page_num_zfill=page_num_zfill,
+        poppler_bin_path=poppler_bin_path,
+        semaphore=threading.BoundedSemaphore(workers))
     converted = list()
-    source_path = _getquotepath(source_path)
-    source_info = pdfinfo(source_path, user_password, owner_password,
-                          poppler_bin_path=poppler_bin_path)
-    pages = source_info[PAGEKEY]
-    output_path = _getquotepath(_stripextension(output_path_prefix))
-    params = [_getcommandpath('pdftoppm', poppler_bin_path)]
-    params.extend(['-r', str(dpi)])
-    if user_password: params.extend(['-upw', user_password])
-    if owner_password: params.extend(['-opw', owner_password])
-    if img_format in EXT:
-        params.append('-{}'.format(img_format))
-        ext = EXT[img_format]
-    else: ext = 'ppm'
-    if img_format == 'tiff' and tiff_compression in TIFFCOMPRESSION:
-        params.extend([COMPSWITCH, tiff_compression])
-    elif img_format == 'tiff': params.extend([COMPSWITCH, 'none'])
-    if grayscale: params.append('-gray')
-    params.extend(ADDLSWITCHES)
-    params.extend([source_path, output_path])
-    for index in range(pages):
-        page = index + 1
-        if page_num_offset and page_num_offset >= -1: page += page_num_offset
-        page = str(page).zfill(page_num_zfill) if page_num_zfill else str(page)
-        fill = dict(filepage=index + 1)
-        if pages > 1 or page_num: fill['page'] = page
-        else: fill['page'] = ''
-        command = ' '.join(params).format(**fill)
-        process = _getprocess(command, poppler_bin_path)
-        converted.append(
-            '.'.join((output_path.format(**fill).strip('"'), ext)))
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=workers) as executor:
+        for rendered in executor.map(render, _getblocks(pages, workers)):
+            converted.extend(rendered)
+    return converted
+
+
+async def convert_async(source_path: str | os.PathLike,
+                        output_path_prefix: str | os.PathLike,
+                        img_format: str = 'tiff', dpi: int = 300,
+                        user_password: str = None,
+                        owner_password: str = None, grayscale: bool = False,
+                        tiff_compression: str = None, page_num: int = False,
+                        page_num_offset: int = None,
+                        page_num_zfill: int = None,
+                        poppler_bin_path: str = None,
+                        thread_count: int = None, pages: int = None,
+                        auto_bitdepth: bool = False) -> list:
+    """Asynchronous variant of convert for callers inside an event loop,
+    where rendering subprocesses run concurrently without blocking the
+    loop. Parameters match convert (without to_bytes), with thread_count
+    bounding the number of simultaneous subprocesses via a semaphore.
+    """
+    source_path = os.fspath(source_path)
+    if not pages:
+        pages = await asyncio.to_thread(
+            _pagecount, source_path, user_password, owner_password,
+            poppler_bin_path)
+    output_path = _stripextension(os.fspath(output_path_prefix))
+    params, ext, tool = _getrenderparams(
+        img_format, dpi, user_password, owner_password, grayscale,
+        tiff_compression, poppler_bin_path)
+    if (auto_bitdepth and not grayscale and img_format in EXT
+        and img_format != 'jpegcmyk'):
+        mode = await asyncio.to_thread(
+            _getcolormode, source_path, user_password, owner_password,
+            poppler_bin_path)
+        if mode == 'mono' and img_format == 'tiff': params += ('-mono',)
+        elif mode: params += ('-gray',)
+    files = source_path, output_path.replace('{page}', '')
+    workers = _getworkers(thread_count)
+    semaphore = asyncio.Semaphore(workers)
+    render = functools.partial(
+        _render_block_async, params=params, files=files,
+        output_path=output_path, ext=ext, pages=pages, page_num=page_num,
+        page_num_offset=page_num_offset, page_num_zfill=page_num_zfill,
+        poppler_bin_path=poppler_bin_path, semaphore=semaphore)
+    converted = list()
+    for rendered in await asyncio.gather(
+        *map(render, _getblocks(pages, workers))):
+        converted.extend(rendered)
     return converted
 
 
-def pdfinfo(source_path: str, user_password: str = None,
+def pdfinfo(source_path: str | os.PathLike, user_password: str = None,
             owner_password: str = None, raw_dates: bool = False,
             timeout: int = None, poppler_bin_path: str = None) -> dict:
     """Returns the information related to a PDF file as a dictionary object
 
     Parameters:
     
-        source_path: str
+        source_path: str or os.PathLike
             The full path to the source PDF file.
 
         user_password (optional): str
@@ -190,56 +294,269 @@ def pdfinfo(source_path: str, user_password: str = None,
             The full path to the Poppler binary folder (for use if the path to
             Poppler binaries is not in the PATH environmental variable).
             DEFAULT: None
+
+    NOTE: Results are cached by source path and file modification time, so
+    repeated calls for an unchanged PDF file do not relaunch pdfinfo.
+    """
+    source_path = os.fspath(source_path)
+    mtime = os.stat(source_path).st_mtime_ns
+    return dict(_pdfinfo_cached(source_path, mtime, user_password,
+                                owner_password, raw_dates, timeout,
+                                poppler_bin_path))
+
+
+@functools.lru_cache(maxsize=128)
+def _pdfinfo_cached(source_path, mtime, user_password, owner_password,
+                    raw_dates, timeout, poppler_bin_path):
+    """Internal function that retrieves PDF file information for pdfinfo,
+    cached on the source path and its modification time to avoid repeated
+    subprocess launches for an unchanged file
     """
-    params = [_getcommandpath('pdfinfo', poppler_bin_path),
-              _getquotepath(source_path)]
+    params = [_getcommandpath('pdfinfo', poppler_bin_path), source_path]
     switches = '-upw', '-opw', '-rawdates'
     for switch, arg in zip(
         switches, (user_password, owner_password, raw_dates)):
         if arg and arg == str(arg): params.extend([switch, arg])
         elif arg: params.append(switch)
-    command = ' '.join(params)
-    process = _getprocess(command, poppler_bin_path)
-    try: data, errors = process.communicate(timeout=timeout)
-    except subprocess.TimeoutExpired: process.kill()
-    info = dict((i.split(':')[0].strip(), ':'.join(i.split(':')[1:]).strip())
-                for i in data.decode('utf8', 'ignore').split('\n')
-                if i.strip())
+    process = _run(params, poppler_bin_path, timeout=timeout,
+                   stdout=subprocess.PIPE)
+    data = process.stdout
+    info = dict((key.strip(), value.strip()) for key, _, value in
+                (line.partition(':') for line in
+                 data.decode('utf8', 'ignore').splitlines() if line.strip()))
     if info.get(PAGEKEY): info[PAGEKEY] = int(info[PAGEKEY])
     else: raise Exception('Unable to retrieve PDF pages')
     return info
 
 
+def _getrenderparams(img_format, dpi, user_password, owner_password,
+                     grayscale, tiff_compression, poppler_bin_path):
+    """Internal function to build the constant prefix of the rendering
+    argument list as a tuple, returning it with the output file extension
+    and the tool name; only the page range and file arguments vary per
+    invocation and are concatenated on by the render helpers
+    """
+    tool = TOOL.get(img_format, 'pdftoppm')
+    params = [_getcommandpath(tool, poppler_bin_path)]
+    params.extend(['-r', str(dpi)])
+    if user_password: params.extend(['-upw', user_password])
+    if owner_password: params.extend(['-opw', owner_password])
+    if img_format in EXT:
+        params.append('-{}'.format(img_format))
+        ext = EXT[img_format]
+    else: ext = 'ppm'
+    if img_format == 'tiff' and tiff_compression in TIFFCOMPRESSION:
+        params.extend([COMPSWITCH, tiff_compression])
+    elif img_format == 'tiff': params.extend([COMPSWITCH, 'none'])
+    if grayscale: params.append('-gray')
+    params.extend(AASWITCHES[tool])
+    return tuple(params), ext, tool
+
+
+def _render_block(block, params, files, output_path, ext, pages, page_num,
+                  page_num_offset, page_num_zfill, poppler_bin_path,
+                  semaphore):
+    """Internal function to render a contiguous block of pages through a
+    single subprocess invocation (bounded by a semaphore), renaming the
+    generated files to match the requested numbering, and returning the
+    paths as a list object
+    """
+    first, last = block
+    argv = (*params, '-f', str(first), '-l', str(last), *files)
+    with semaphore: process = _run(argv, poppler_bin_path)
+    if process.returncode:
+        raise Exception('Unable to render pages {}-{}: {}'.format(
+            first, last, process.stderr.decode('utf8', 'ignore').strip()))
+    return _collectblock(block, output_path, ext, pages, page_num,
+                         page_num_offset, page_num_zfill)
+
+
+async def _render_block_async(block, params, files, output_path, ext, pages,
+                              page_num, page_num_offset, page_num_zfill,
+                              poppler_bin_path, semaphore):
+    """Internal coroutine counterpart to _render_block, rendering a block
+    of pages through an asyncio subprocess bounded by a semaphore
+    """
+    first, last = block
+    argv = (*params, '-f', str(first), '-l', str(last), *files)
+    async with semaphore:
+        process = await asyncio.create_subprocess_exec(
+            *argv, env=_getenvirons(poppler_bin_path),
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            startupinfo=_STARTUPINFO)
+        _, errors = await process.communicate()
+    if process.returncode:
+        raise Exception('Unable to render pages {}-{}: {}'.format(
+            first, last, errors.decode('utf8', 'ignore').strip()))
+    return _collectblock(block, output_path, ext, pages, page_num,
+                         page_num_offset, page_num_zfill)
+
+
+def _getcolormode(source_path, user_password, owner_password,
+                  poppler_bin_path):
+    """Internal function to inspect the images embedded in a PDF file (via
+    pdfimages -list) and return 'mono' if all are 1-bit monochrome or
+    'gray' if all are grayscale (None otherwise, including when the file
+    lists no images or cannot be inspected)
+    """
+    params = [_getcommandpath('pdfimages', poppler_bin_path), '-list']
+    if user_password: params.extend(['-upw', user_password])
+    if owner_password: params.extend(['-opw', owner_password])
+    params.append(source_path)
+    process = _run(params, poppler_bin_path, stdout=subprocess.PIPE)
+    if process.returncode: return None
+    colors, depths = set(), set()
+    for line in process.stdout.decode('utf8', 'ignore').splitlines()[2:]:
+        fields = line.split()
+        if len(fields) < 8: continue
+        colors.add(fields[5])
+        depths.add(fields[7])
+    if not colors or not colors <= {'gray', 'mono'}: return None
+    return 'mono' if depths <= {'1'} else 'gray'
+
+
+def _collectblock(block, output_path, ext, pages, page_num, page_num_offset,
+                  page_num_zfill):
+    """Internal function to rename the files generated for a block of pages
+    to match the requested numbering and return the paths as a list object
+    """
+    first, last = block
+    rendered, width = list(), len(str(pages))
+    prefix = output_path.replace('{page}', '')
+    offset = (page_num_offset
+              if page_num_offset and page_num_offset >= -1 else 0)
+    if page_num_zfill: fmt = lambda p: str(p).zfill(page_num_zfill)
+    else: fmt = str
+    numbered = pages > 1 or page_num
+    for index in range(first - 1, last):
+        page = fmt(index + 1 + offset) if numbered else ''
+        generated = '{}-{}.{}'.format(prefix, str(index + 1).zfill(width),
+                                      ext)
+        target = '.'.join((output_path.replace('{page}', page), ext))
+        if generated != target and os.path.exists(generated):
+            os.replace(generated, target)
+        rendered.append(target)
+    return rendered
+
+
+def _render_page_bytes(page, params, files, poppler_bin_path, semaphore):
+    """Internal function to render a single page of a PDF file to memory
+    (via the tool's standard output, bounded by a semaphore) and return the
+    image contents as a bytes object
+    """
+    number = str(page)
+    argv = (*params, '-singlefile', '-f', number, '-l', number, *files)
+    with semaphore:
+        process = _run(argv, poppler_bin_path, stdout=subprocess.PIPE)
+    if process.returncode:
+        raise Exception('Unable to render page {}: {}'.format(
+            page, process.stderr.decode('utf8', 'ignore').strip()))
+    return process.stdout
+
+
+def _getworkers(thread_count):
+    """Internal function to determine the number of concurrent rendering
+    subprocesses, capping the default at MAXPROCESSES to stay clear of
+    file-handle exhaustion and the point where process contention erases
+    the concurrency gain
+    """
+    if thread_count: return thread_count
+    return max(1, min((os.cpu_count() or 2) - 1, MAXPROCESSES))
+
+
+def _getblocks(pages, workers):
+    """Internal function to split a page count into contiguous blocks of
+    near-equal size, one block per worker
+    """
+    count = min(workers, pages)
+    size, extra = divmod(pages, count)
+    blocks, first = list(), 1
+    for i in range(count):
+        last = first + size + (1 if i < extra else 0) - 1
+        blocks.append((first, last))
+        first = last + 1
+    return blocks
+
+
+def _pagecount(source_path, user_password, owner_password,
+               poppler_bin_path):
+    """Internal function to return the page count of a PDF file, delegating
+    to a cached helper keyed on the file modification time (as pdfinfo)
+    """
+    mtime = os.stat(source_path).st_mtime_ns
+    return _pagecount_cached(source_path, mtime, user_password,
+                             owner_password, poppler_bin_path)
+
+
+@functools.lru_cache(maxsize=128)
+def _pagecount_cached(source_path, mtime, user_password, owner_password,
+                      poppler_bin_path):
+    """Internal function that launches pdfinfo and extracts only the page
+    count via _pagesonly, skipping the full decode and dictionary build
+    that the public pdfinfo performs
+    """
+    params = [_getcommandpath('pdfinfo', poppler_bin_path), source_path]
+    if user_password: params.extend(['-upw', user_password])
+    if owner_password: params.extend(['-opw', owner_password])
+    process = _run(params, poppler_bin_path, stdout=subprocess.PIPE)
+    return _pagesonly(process.stdout)
+
+
+def _pagesonly(raw: bytes) -> int:
+    """Internal function to extract the page count directly from raw
+    pdfinfo output bytes, scanning only as far as the Pages line
+    """
+    index = raw.find(b'\nPages:')
+    if index >= 0: index += 1
+    elif raw.startswith(b'Pages:'): index = 0
+    else: raise Exception('Unable to retrieve PDF pages')
+    end = raw.find(b'\n', index)
+    if end < 0: end = len(raw)
+    return int(raw[index + 6:end])
+
+
 def _getcommandpath(name: str, poppler_bin_path: str=None) -> str:
     """Internal function to return a command path for an executable within
     the Poppler binary directory path, including the binary directory
     in the command path if specified
     """
     name = '.'.join((name, 'exe'))
-    if poppler_bin_path:
-        return _getquotepath(os.path.join(poppler_bin_path, name))
+    if poppler_bin_path: return os.path.join(poppler_bin_path, name)
     return name
 
 
-def _getprocess(command, poppler_bin_path: str=None):
-    """Internal function that returns an opened process that functions
-    quiety (i.e., does not create a command line window in execution)
+def _run(command: list, poppler_bin_path: str=None, timeout: int=None,
+         stdout=subprocess.DEVNULL):
+    """Internal function that runs a command argument list to completion
+    quietly (i.e., does not create a command line window in execution) and
+    returns the completed process
     """
-    environs = os.environ.copy()
-    startupinfo = subprocess.STARTUPINFO()
-    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-    process = subprocess.Popen(command, env=environs, stdout=subprocess.PIPE,
-                               stderr=subprocess.PIPE, startupinfo=startupinfo)
-    return process
+    return subprocess.run(command, env=_getenvirons(poppler_bin_path),
+                          stdout=stdout, stderr=subprocess.PIPE,
+                          startupinfo=_STARTUPINFO, timeout=timeout)
 
 
-def _stripextension(path):
-    """Internal function to strip the extension from a filename in a path"""
-    folder, file = os.path.dirname(path), os.path.basename(path)
-    name, ext = os.path.splitext(file)
-    if '{page}' in ext: name += ext
-    if '{page}' not in name: name += {page}
-    return os.path.join(folder, name)
+def _getenvirons(poppler_bin_path: str=None):
+    """Internal function to return the environment for a subprocess,
+    building and caching a copy with the Poppler binary folder prepended to
+    PATH if one is specified (None otherwise, so the child simply inherits
+    the parent environment)
+    """
+    key = poppler_bin_path or ''
+    if key not in _ENVIRONS:
+        _ENVIRONS[key] = None if not poppler_bin_path else {
+            **os.environ, 'PATH': os.pathsep.join(
+                (poppler_bin_path, os.environ.get('PATH', '')))}
+    return _ENVIRONS[key]
 
 
-def _getquotepath(path): return '"{}"'.format(path.strip('"'))
+def _stripextension(path):
+    """Internal function to strip the extension from a filename in a path
+    and to ensure the result carries a '{page}' placeholder, splitting the
+    path once instead of parsing it through multiple os.path calls
+    """
+    head, dot, tail = path.rpartition('.')
+    if (dot and head and head[-1] not in (os.sep, '/')
+        and '{page}' not in tail and os.sep not in tail
+        and '/' not in tail): path = head
+    return path if '{page}' in path else path + '{page}'
@@ -0,0 +1,160 @@
+"""unit tests for the pure helper functions in pypdftoimage, runnable
+without the Poppler binaries installed
+"""
+
+
+import os, unittest
+
+import pypdftoimage
+
+
+class StripExtensionTest(unittest.TestCase):
+
+    def test_strips_extension(self):
+        self.assertEqual(pypdftoimage._stripextension('out.tif'),
+                         'out{page}')
+
+    def test_no_extension(self):
+        self.assertEqual(
+            pypdftoimage._stripextension(os.path.join('dir', 'out')),
+            os.path.join('dir', 'out{page}'))
+
+    def test_keeps_existing_placeholder(self):
+        self.assertEqual(
+            pypdftoimage._stripextension(
+                os.path.join('dir', 'out-{page}.png')),
+            os.path.join('dir', 'out-{page}'))
+
+    def test_dot_in_folder_only(self):
+        self.assertEqual(pypdftoimage._stripextension('dir.v2/out'),
+                         'dir.v2/out{page}')
+
+    def test_dotfile_name_kept(self):
+        self.assertEqual(pypdftoimage._stripextension('/dir/.hidden'),
+                         '/dir/.hidden{page}')
+
+    def test_leading_dot_only(self):
+        self.assertEqual(pypdftoimage._stripextension('.hidden'),
+                         '.hidden{page}')
+
+    def test_placeholder_as_extension(self):
+        self.assertEqual(pypdftoimage._stripextension('out.{page}'),
+                         'out.{page}')
+
+
+class PagesOnlyTest(unittest.TestCase):
+
+    def test_extracts_page_count(self):
+        raw = b'Title: sample\r\nPages:          12\r\nEncrypted: no\r\n'
+        self.assertEqual(pypdftoimage._pagesonly(raw), 12)
+
+    def test_pages_on_first_line(self):
+        self.assertEqual(pypdftoimage._pagesonly(b'Pages: 3'), 3)
+
+    def test_missing_page_count(self):
+        with self.assertRaises(Exception):
+            pypdftoimage._pagesonly(b'Title: sample\n')
+
+
+class GetBlocksTest(unittest.TestCase):
+
+    def test_blocks_cover_all_pages(self):
+        blocks = pypdftoimage._getblocks(10, 3)
+        self.assertEqual(blocks, [(1, 4), (5, 7), (8, 10)])
+
+    def test_one_block_per_page_at_most(self):
+        self.assertEqual(pypdftoimage._getblocks(2, 8), [(1, 1), (2, 2)])
+
+    def test_single_page(self):
+        self.assertEqual(pypdftoimage._getblocks(1, 4), [(1, 1)])
+
+
+class CollectBlockTest(unittest.TestCase):
+
+    def test_numbering_with_offset_and_zfill(self):
+        rendered = pypdftoimage._collectblock(
+            (2, 3), os.path.join('dir', 'out{page}'), 'tif', 5, False, -1, 3)
+        self.assertEqual(rendered, [os.path.join('dir', 'out001.tif'),
+                                    os.path.join('dir', 'out002.tif')])
+
+    def test_single_page_unnumbered(self):
+        rendered = pypdftoimage._collectblock(
+            (1, 1), 'out{page}', 'png', 1, False, None, None)
+        self.assertEqual(rendered, ['out.png'])
+
+    def test_single_page_numbered_on_request(self):
+        rendered = pypdftoimage._collectblock(
+            (1, 1), 'out{page}', 'png', 1, True, None, None)
+        self.assertEqual(rendered, ['out1.png'])
+
+
+class GetWorkersTest(unittest.TestCase):
+
+    def test_explicit_count_honored(self):
+        self.assertEqual(pypdftoimage._getworkers(16), 16)
+
+    def test_default_within_bounds(self):
+        workers = pypdftoimage._getworkers(None)
+        self.assertGreaterEqual(workers, 1)
+        self.assertLessEqual(workers, pypdftoimage.MAXPROCESSES)
+
+
+class GetRenderParamsTest(unittest.TestCase):
+
+    def test_tiff_defaults_to_no_compression(self):
+        params, ext, tool = pypdftoimage._getrenderparams(
+            'tiff', 300, None, None, False, None, None)
+        self.assertEqual(tool, 'pdftoppm')
+        self.assertEqual(ext, 'tif')
+        self.assertIn(pypdftoimage.COMPSWITCH, params)
+        self.assertEqual(params[params.index(pypdftoimage.COMPSWITCH) + 1],
+                         'none')
+
+    def test_invalid_tiff_compression_ignored(self):
+        params, ext, tool = pypdftoimage._getrenderparams(
+            'tiff', 300, None, None, False, 'bogus', None)
+        self.assertEqual(params[params.index(pypdftoimage.COMPSWITCH) + 1],
+                         'none')
+
+    def test_valid_tiff_compression_applied(self):
+        params, ext, tool = pypdftoimage._getrenderparams(
+            'tiff', 300, None, None, False, 'lzw', None)
+        self.assertEqual(params[params.index(pypdftoimage.COMPSWITCH) + 1],
+                         'lzw')
+
+    def test_png_routes_to_pdftocairo(self):
+        params, ext, tool = pypdftoimage._getrenderparams(
+            'png', 300, None, None, False, None, None)
+        self.assertEqual(tool, 'pdftocairo')
+        self.assertEqual(ext, 'png')
+        self.assertIn('-antialias', params)
+        self.assertNotIn('-aa', params)
+
+    def test_unknown_format_falls_back_to_ppm(self):
+        params, ext, tool = pypdftoimage._getrenderparams(
+            'bmp', 300, None, None, False, None, None)
+        self.assertEqual(tool, 'pdftoppm')
+        self.assertEqual(ext, 'ppm')
+
+    def test_passwords_and_grayscale(self):
+        params, ext, tool = pypdftoimage._getrenderparams(
+            'jpeg', 150, 'user', 'owner', True, None, None)
+        self.assertIn('-upw', params)
+        self.assertIn('-opw', params)
+        self.assertIn('-gray', params)
+        self.assertIn('150', params)
+
+
+class ConvertValidationTest(unittest.TestCase):
+
+    def test_tiff_to_bytes_rejected(self):
+        with self.assertRaises(Exception):
+            pypdftoimage.convert('in.pdf', 'out', img_format='tiff',
+                                 pages=1, to_bytes=True)
+
+    def test_tiff_compression_options(self):
+        self.assertEqual(pypdftoimage.TIFFCOMPRESSION,
+                         frozenset({'packbits', 'jpeg', 'lzw', 'deflate'}))
+
+
+if __name__ == '__main__': unittest.main()